@@ -0,0 +1,27 @@
+import { NextResponse } from 'next/server'
+import { getAnalysisQueueStats, requeueExpiredAnalyses } from '@/lib/db-helpers'
+
+export const dynamic = 'force-dynamic'
+
+export async function GET() {
+  try {
+    // Rows left in processing by a crashed run go back to pending before counting
+    const requeued = await requeueExpiredAnalyses()
+    const stats = await getAnalysisQueueStats()
+    
+    if (!stats) {
+      return NextResponse.json(
+        { error: 'Failed to fetch queue stats' },
+        { status: 500 }
+      )
+    }
+    
+    return NextResponse.json({ queue: { ...stats, requeued } })
+  } catch (error: any) {
+    console.error('Error fetching queue stats:', error)
+    return NextResponse.json(
+      { error: error?.message ?? 'Failed to fetch queue stats' },
+      { status: 500 }
+    )
+  }
+}
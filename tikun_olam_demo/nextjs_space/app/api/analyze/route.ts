@@ -1,26 +1,27 @@
 import { NextRequest, NextResponse } from 'next/server'
+import { Prisma } from '@prisma/client'
 import { prisma } from '@/lib/db'
+import { claimUserAnalysis, renewAnalysisLease } from '@/lib/db-helpers'
+import { AnalysisEvent, PipelineMetrics, SefiraResultPayload } from '@/lib/types'
 
 export const dynamic = 'force-dynamic'
 
+// Simulated processing time per Sefira in the mock pipeline
+const MOCK_SEFIRA_DELAY_MS = 300
+
 // Mock analysis function - simulates the Python framework
-// In production, this would call the actual Python TikunOrchestrator
-async function mockAnalysis(caseName: string, scenario: string) {
-  // Simulate processing time
-  await new Promise(resolve => setTimeout(resolve, 2000))
+// In production, this would call the actual Python TikunOrchestrator.
+// Its events follow the AnalysisEvent contract, but timings are simulated.
+async function mockAnalysis(
+  caseName: string,
+  scenario: string,
+  onEvent?: (event: AnalysisEvent) => void
+) {
+  const startTime = Date.now()
   
   // Create basic analysis structure
   const timestamp = new Date()
   
-  // Create case in database
-  const caseRecord = await prisma.case.create({
-    data: {
-      caseName,
-      scenario,
-      timestamp,
-    },
-  })
-  
   // Create mock sefirot results
   const sefirotData = [
     { sefira: 'keter', number: 1, hebrew: 'כתר', score: 75 },
@@ -34,27 +35,108 @@ async function mockAnalysis(caseName: string, scenario: string) {
     { sefira: 'yesod', number: 9, hebrew: 'יסוד', score: 85 },
     { sefira: 'malchut', number: 10, hebrew: 'מלכות', score: 92 },
   ]
+  const total = sefirotData?.length ?? 0
+  const sefirotRows: Prisma.SefirotResultCreateManyCaseInput[] = []
+  const sefirotResults: Record<string, SefiraResultPayload> = {}
+  let completed = 0
   
   for (const sefira of sefirotData ?? []) {
-    await prisma.sefirotResult.create({
-      data: {
-        caseId: caseRecord?.id,
-        sefira: sefira?.sefira,
-        sefirotNumber: sefira?.number,
-        hebrewName: sefira?.hebrew,
-        mainScore: sefira?.score,
-        analysisData: {
-          understanding: `Mock analysis for ${sefira?.sefira}`,
-          reasoning: `This is a simulated analysis result.`,
-        },
-        modelUsed: 'gpt-4.1-mini',
-      },
+    onEvent?.({
+      status: 'processing',
+      event: 'sefira_started',
+      sefira: sefira?.sefira,
+      sefiraNumber: sefira?.number,
+      message: `Analyzing through Sefirot ${sefira?.number}/${total}...`,
+    })
+    
+    // Simulate processing time
+    await new Promise(resolve => setTimeout(resolve, MOCK_SEFIRA_DELAY_MS))
+    
+    const analysisData = {
+      understanding: `Mock analysis for ${sefira?.sefira}`,
+      reasoning: `This is a simulated analysis result.`,
+    }
+    sefirotRows.push({
+      sefira: sefira?.sefira,
+      sefirotNumber: sefira?.number,
+      hebrewName: sefira?.hebrew,
+      mainScore: sefira?.score,
+      analysisData,
+      modelUsed: 'gpt-4.1-mini',
+    })
+    
+    const result: SefiraResultPayload = {
+      sefira: sefira?.sefira,
+      sefira_number: sefira?.number,
+      hebrew_name: sefira?.hebrew,
+      main_score: sefira?.score,
+      ...analysisData,
+    }
+    sefirotResults[sefira?.sefira] = result
+    
+    completed++
+    onEvent?.({
+      status: 'processing',
+      event: 'sefira_completed',
+      sefira: sefira?.sefira,
+      sefiraNumber: sefira?.number,
+      completed,
+      total,
+      result,
+      message: `Sefirot ${completed}/${total} completed (${sefira?.sefira})`,
     })
   }
   
-  return {
+  // Create the case and all its Sefirot atomically in one multi-row insert
+  await prisma.case.create({
+    data: {
+      caseName,
+      scenario,
+      timestamp,
+      sefirotResults: {
+        createMany: { data: sefirotRows },
+      },
+    },
+  })
+  
+  onEvent?.({
+    status: 'processing',
+    event: 'results_persisted',
     caseName,
-    completed: true,
+    total,
+    message: 'Results saved',
+  })
+  
+  const totalDuration = (Date.now() - startTime) / 1000
+  const pipelineMetrics: PipelineMetrics = {
+    total_sefirot: total,
+    successful_sefirot: completed,
+    failed_sefirot: total - completed,
+    total_duration_seconds: totalDuration,
+    avg_duration_per_sefira: totalDuration / (total || 1),
+  }
+  onEvent?.({
+    status: 'processing',
+    event: 'pipeline_metrics',
+    metrics: pipelineMetrics,
+    message: 'Pipeline completed',
+  })
+  
+  return {
+    summary: {
+      caseName,
+      completed: true,
+    },
+    // Same top-level layout as the orchestrator's exported results
+    results: {
+      metadata: {
+        case_name: caseName,
+        timestamp: timestamp.toISOString(),
+        scenario,
+      },
+      sefirot_results: sefirotResults,
+      pipeline_metrics: pipelineMetrics,
+    },
   }
 }
 
@@ -71,40 +153,86 @@ export async function POST(request: NextRequest) {
       )
     }
     
+    // Record the request so its status survives the HTTP stream
+    const analysis = await prisma.userAnalysis.create({
+      data: {
+        caseName,
+        scenario,
+        status: 'pending',
+      },
+    })
+    
     // Create streaming response
     const stream = new ReadableStream({
       async start(controller) {
         const encoder = new TextEncoder()
         
+        // Best-effort delivery: a disconnected client must not abort the analysis
+        const send = (chunk: string) => {
+          try {
+            controller?.enqueue?.(encoder?.encode?.(chunk))
+          } catch {
+            // Stream already closed by the client; keep running
+          }
+        }
+        
         try {
-          // Send progress updates
-          for (let i = 0; i < 10; i++) {
-            const progressData = JSON.stringify({
-              status: 'processing',
-              message: `Analyzing through Sefirot ${i + 1}/10...`,
-            })
-            controller?.enqueue?.(encoder?.encode?.(`data: ${progressData}\n\n`))
-            await new Promise(resolve => setTimeout(resolve, 300))
+          // Claim atomically; if an external worker took the row first, leave it to them
+          if (!(await claimUserAnalysis(analysis.id))) {
+            send(`data: ${JSON.stringify({ status: 'queued', analysisId: analysis.id })}\n\n`)
+            send('data: [DONE]\n\n')
+            return
           }
           
-          // Run analysis
-          const result = await mockAnalysis(caseName, scenario)
+          // Run analysis, forwarding each Sefira event as it happens
+          const { summary, results } = await mockAnalysis(caseName, scenario, (event) => {
+            send(`data: ${JSON.stringify(event)}\n\n`)
+            if (event.event === 'sefira_completed') {
+              void renewAnalysisLease(analysis.id)
+            }
+          })
+          
+          await prisma.userAnalysis.update({
+            where: { id: analysis.id },
+            data: {
+              status: 'completed',
+              results,
+              leaseExpiresAt: null,
+              completedAt: new Date(),
+            },
+          })
           
           // Send completion
           const completionData = JSON.stringify({
             status: 'completed',
-            result,
+            result: { ...summary, analysisId: analysis.id },
           })
-          controller?.enqueue?.(encoder?.encode?.(`data: ${completionData}\n\n`))
-          controller?.enqueue?.(encoder?.encode?.('data: [DONE]\n\n'))
+          send(`data: ${completionData}\n\n`)
+          send('data: [DONE]\n\n')
         } catch (error: any) {
+          // Only analysis or persistence failures reach here; send() never throws
+          await prisma.userAnalysis.update({
+            where: { id: analysis.id },
+            data: {
+              status: 'error',
+              error: error?.message ?? 'Analysis failed',
+              leaseExpiresAt: null,
+            },
+          }).catch((updateError: any) => {
+            console.error('Failed to record analysis error:', updateError)
+          })
+          
           const errorData = JSON.stringify({
             status: 'error',
             message: error?.message ?? 'Analysis failed',
           })
-          controller?.enqueue?.(encoder?.encode?.(`data: ${errorData}\n\n`))
+          send(`data: ${errorData}\n\n`)
         } finally {
-          controller?.close?.()
+          try {
+            controller?.close?.()
+          } catch {
+            // Already closed by the client
+          }
         }
       },
     })
@@ -4,12 +4,13 @@ import { useState } from 'react'
 import { Sparkles, Loader2, CheckCircle, XCircle } from 'lucide-react'
 import { Button } from '@/components/ui/button'
 import { useRouter } from 'next/navigation'
+import { AnalysisStreamMessage } from '@/lib/types'
 
 export default function NewAnalysisPage() {
   const router = useRouter()
   const [caseName, setCaseName] = useState('')
   const [scenario, setScenario] = useState('')
-  const [status, setStatus] = useState<'idle' | 'processing' | 'completed' | 'error'>('idle')
+  const [status, setStatus] = useState<'idle' | 'processing' | 'queued' | 'completed' | 'error'>('idle')
   const [progress, setProgress] = useState(0)
   const [error, setError] = useState('')
   const [result, setResult] = useState<any>(null)
@@ -59,9 +60,14 @@ export default function NewAnalysisPage() {
             }
             
             try {
-              const parsed = JSON.parse(data ?? '{}')
+              const parsed: AnalysisStreamMessage = JSON.parse(data ?? '{}')
               if (parsed?.status === 'processing') {
-                setProgress((prev) => Math.min(prev + 2, 95))
+                // Sefirot fill the bar up to 90%; the last 5% waits for the results to be saved
+                if (parsed.event === 'sefira_completed' && parsed.total) {
+                  setProgress(Math.min(Math.round((parsed.completed / parsed.total) * 90), 90))
+                } else if (parsed.event === 'results_persisted') {
+                  setProgress(95)
+                }
               } else if (parsed?.status === 'completed') {
                 setResult(parsed?.result ?? null)
                 setStatus('completed')
@@ -72,6 +78,10 @@ export default function NewAnalysisPage() {
                   router?.push?.('/demo-cases')
                 }, 2000)
                 return
+              } else if (parsed?.status === 'queued') {
+                // Picked up by a background worker; results land in Demo Cases when done
+                setStatus('queued')
+                return
               } else if (parsed?.status === 'error') {
                 throw new Error(parsed?.message ?? 'Analysis failed')
               }
@@ -193,6 +203,20 @@ export default function NewAnalysisPage() {
           </div>
         )}
 
+        {status === 'queued' && (
+          <div className="mt-6 bg-blue-950/30 border border-blue-700/30 rounded-xl p-6">
+            <div className="flex items-start gap-4">
+              <CheckCircle className="w-6 h-6 text-blue-400 flex-shrink-0 mt-1" />
+              <div>
+                <h3 className="text-lg font-semibold text-white mb-2">Analysis Queued</h3>
+                <p className="text-sm text-gray-300">
+                  Your analysis is being processed in the background. Results will appear in Demo Cases when it completes.
+                </p>
+              </div>
+            </div>
+          </div>
+        )}
+
         {status === 'error' && error && (
           <div className="mt-6 bg-red-950/30 border border-red-700/30 rounded-xl p-6">
             <div className="flex items-start gap-4">
@@ -3,23 +3,48 @@
  */
 
 import { prisma } from './db'
-import { Case, SefirotResult, BinahSigma } from '@prisma/client'
+import { Prisma, Case, SefirotResult, BinahSigma } from '@prisma/client'
 
 export type CaseWithResults = Case & {
   sefirotResults: SefirotResult[]
   binahSigma: BinahSigma | null
 }
 
+// Listing columns only: leaves out analysisData and the BinahSigma JSON blobs
+const caseSummarySelect = {
+  id: true,
+  caseName: true,
+  scenario: true,
+  executionId: true,
+  timestamp: true,
+  createdAt: true,
+  sefirotResults: {
+    select: {
+      id: true,
+      sefira: true,
+      sefirotNumber: true,
+      hebrewName: true,
+      mainScore: true,
+    },
+  },
+  binahSigma: {
+    select: {
+      id: true,
+      biasDelta: true,
+      divergenceLevel: true,
+    },
+  },
+} satisfies Prisma.CaseSelect
+
+export type CaseSummary = Prisma.CaseGetPayload<{ select: typeof caseSummarySelect }>
+
 /**
- * Get all cases with their results
+ * Get all cases with their summary scores
  */
-export async function getAllCases(): Promise<CaseWithResults[]> {
+export async function getAllCases(): Promise<CaseSummary[]> {
   try {
     const cases = await prisma.case.findMany({
-      include: {
-        sefirotResults: true,
-        binahSigma: true,
-      },
+      select: caseSummarySelect,
       orderBy: {
         timestamp: 'desc',
       },
@@ -86,3 +111,118 @@ export async function getBinahSigma(caseId: string): Promise<BinahSigma | null>
     return null
   }
 }
+
+/**
+ * How long a claimed UserAnalysis stays leased without being renewed
+ */
+export const ANALYSIS_LEASE_MS = 5 * 60 * 1000
+
+/**
+ * Atomically claim a pending UserAnalysis (pending -> processing).
+ * Returns false if another consumer claimed it first.
+ */
+export async function claimUserAnalysis(id: string): Promise<boolean> {
+  const now = new Date()
+  const { count } = await prisma.userAnalysis.updateMany({
+    where: { id, status: 'pending' },
+    data: {
+      status: 'processing',
+      startedAt: now,
+      leaseExpiresAt: new Date(now.getTime() + ANALYSIS_LEASE_MS),
+    },
+  })
+  return count === 1
+}
+
+/**
+ * Extend the lease on a UserAnalysis that is still processing
+ */
+export async function renewAnalysisLease(id: string): Promise<void> {
+  try {
+    await prisma.userAnalysis.updateMany({
+      where: { id, status: 'processing' },
+      data: { leaseExpiresAt: new Date(Date.now() + ANALYSIS_LEASE_MS) },
+    })
+  } catch (error) {
+    console.error(`Error renewing lease for analysis ${id}:`, error)
+  }
+}
+
+/**
+ * Return processing rows whose lease expired (e.g. after a server crash) to pending
+ */
+export async function requeueExpiredAnalyses(): Promise<number> {
+  try {
+    const { count } = await prisma.userAnalysis.updateMany({
+      where: {
+        status: 'processing',
+        leaseExpiresAt: { lt: new Date() },
+      },
+      data: {
+        status: 'pending',
+        startedAt: null,
+        leaseExpiresAt: null,
+      },
+    })
+    return count
+  } catch (error) {
+    console.error('Error requeueing expired analyses:', error)
+    return 0
+  }
+}
+
+export type AnalysisQueueStats = {
+  pending: number
+  processing: number
+  oldestPendingSeconds: number | null
+  avgWaitSeconds: number | null
+  avgRunSeconds: number | null
+  completedLastHour: number
+  failedLastHour: number
+}
+
+/**
+ * Queue depth, wait time (createdAt -> startedAt) and throughput over the last hour
+ */
+export async function getAnalysisQueueStats(): Promise<AnalysisQueueStats | null> {
+  try {
+    const hourAgo = new Date(Date.now() - 60 * 60 * 1000)
+    const [pending, processing, oldestPending, recent, failedLastHour] = await Promise.all([
+      prisma.userAnalysis.count({ where: { status: 'pending' } }),
+      prisma.userAnalysis.count({ where: { status: 'processing' } }),
+      prisma.userAnalysis.findFirst({
+        where: { status: 'pending' },
+        orderBy: { createdAt: 'asc' },
+        select: { createdAt: true },
+      }),
+      prisma.userAnalysis.findMany({
+        where: { status: 'completed', completedAt: { gte: hourAgo } },
+        select: { createdAt: true, startedAt: true, completedAt: true },
+      }),
+      prisma.userAnalysis.count({ where: { status: 'error', createdAt: { gte: hourAgo } } }),
+    ])
+
+    const started = recent.filter((r) => r.startedAt && r.completedAt)
+    const average = (values: number[]) =>
+      values.length ? values.reduce((acc, v) => acc + v, 0) / values.length : null
+
+    return {
+      pending,
+      processing,
+      oldestPendingSeconds: oldestPending
+        ? (Date.now() - oldestPending.createdAt.getTime()) / 1000
+        : null,
+      avgWaitSeconds: average(
+        started.map((r) => (r.startedAt!.getTime() - r.createdAt.getTime()) / 1000)
+      ),
+      avgRunSeconds: average(
+        started.map((r) => (r.completedAt!.getTime() - r.startedAt!.getTime()) / 1000)
+      ),
+      completedLastHour: recent.length,
+      failedLastHour,
+    }
+  } catch (error) {
+    console.error('Error fetching analysis queue stats:', error)
+    return null
+  }
+}
@@ -25,4 +25,71 @@ export const EXPENSE_CATEGORIES = [
 export type DateRange = {
   from: Date | undefined
   to: Date | undefined
-}
\ No newline at end of file
+}
+
+// Framework Tikun Olam - /api/analyze SSE contract
+
+export type SefiraResultPayload = {
+  sefira: string
+  sefira_number: number
+  hebrew_name: string
+  main_score: number | null
+  [field: string]: unknown
+}
+
+export type PipelineMetrics = {
+  total_sefirot: number
+  successful_sefirot: number
+  failed_sefirot: number
+  total_duration_seconds: number
+  avg_duration_per_sefira: number
+}
+
+// Progress events emitted while the Sefirot run, in this order per analysis:
+// sefira_started/sefira_completed for each Sefira, results_persisted, pipeline_metrics
+export type AnalysisEvent =
+  | {
+      status: 'processing'
+      event: 'sefira_started'
+      sefira: string
+      sefiraNumber: number
+      message: string
+    }
+  | {
+      status: 'processing'
+      event: 'sefira_completed'
+      sefira: string
+      sefiraNumber: number
+      completed: number
+      total: number
+      result: SefiraResultPayload
+      message: string
+    }
+  | {
+      status: 'processing'
+      event: 'results_persisted'
+      caseName: string
+      total: number
+      message: string
+    }
+  | {
+      status: 'processing'
+      event: 'pipeline_metrics'
+      metrics: PipelineMetrics
+      message: string
+    }
+
+export type AnalysisStreamMessage =
+  | AnalysisEvent
+  | {
+      status: 'completed'
+      result: { caseName: string; completed: boolean; analysisId?: string }
+    }
+  | {
+      status: 'queued'
+      analysisId: string
+    }
+  | {
+      status: 'error'
+      message: string
+    }
@@ -1,11 +1,19 @@
 /**
  * Seed script for Framework Tikun Olam Demo
- * Populates database with pre-calculated demo cases
+ * Loads exported TikunOrchestrator runs into the database
+ *
+ * Usage: tsx scripts/seed.ts [path ...] [--reset] [--chunk-size=N]
+ *   path          JSON export, JSONL/NDJSON file (one export per line) or a
+ *                 directory of those. Defaults to the bundled data/ directory.
+ *   --reset       Delete all Case/SefirotResult/BinahSigma rows first
+ *                 (UserAnalysis rows are never touched)
+ *   --chunk-size  Cases written per transaction (default 50)
  */
 
-import { PrismaClient } from '@prisma/client'
+import { Prisma, PrismaClient } from '@prisma/client'
 import * as fs from 'fs'
 import * as path from 'path'
+import * as readline from 'readline'
 
 const prisma = new PrismaClient()
 
@@ -19,162 +27,265 @@ type SefirotData = {
   sefirot_results: Record<string, any>
 }
 
+type SeedOutcome = 'created' | 'replaced' | 'skipped'
+
 const SEFIROT_ORDER = [
-  'keter', 'chochmah', 'binah', 'chesed', 'gevurah', 
+  'keter', 'chochmah', 'binah', 'chesed', 'gevurah',
   'tiferet', 'netzach', 'hod', 'yesod', 'malchut'
 ]
 
-async function seedCase(jsonPath: string) {
-  console.log(`\n📊 Seeding case from: ${path.basename(jsonPath)}`);
-  
-  // Read JSON file
-  const rawData = fs.readFileSync(jsonPath, 'utf-8')
-  const data: SefirotData = JSON.parse(rawData)
-  
+// Main score field for each Sefira (same keys as SEFIROT_INFO.scoreKey)
+const MAIN_SCORE_KEYS: Record<string, string> = {
+  keter: 'alignment_score',
+  chochmah: 'confidence_level',
+  binah: 'contextual_depth_score',
+  chesed: 'expansion_score',
+  gevurah: 'severity_score',
+  tiferet: 'harmony_score',
+  netzach: 'persistence_score',
+  hod: 'splendor_score',
+  yesod: 'integration_score',
+  malchut: 'manifestation_score',
+}
+
+const DEFAULT_CHUNK_SIZE = 50
+const EXPORT_EXTENSIONS = ['.json', '.jsonl', '.ndjson']
+
+/**
+ * Stream exports from a JSON file, a JSONL/NDJSON file or a directory of them
+ */
+async function* readExports(inputPath: string): AsyncGenerator<SefirotData> {
+  const stat = await fs.promises.stat(inputPath)
+
+  if (stat.isDirectory()) {
+    const entries = (await fs.promises.readdir(inputPath))
+      .filter((name) => EXPORT_EXTENSIONS.includes(path.extname(name).toLowerCase()))
+      .sort()
+    for (const name of entries) {
+      yield* readExports(path.join(inputPath, name))
+    }
+    return
+  }
+
+  if (path.extname(inputPath).toLowerCase() === '.json') {
+    const rawData = await fs.promises.readFile(inputPath, 'utf-8')
+    yield JSON.parse(rawData)
+    return
+  }
+
+  // JSONL/NDJSON: one export per line, read without loading the whole file
+  const lines = readline.createInterface({
+    input: fs.createReadStream(inputPath, 'utf-8'),
+    crlfDelay: Infinity,
+  })
+  let lineNumber = 0
+  for await (const line of lines) {
+    lineNumber++
+    if (!line.trim()) continue
+    try {
+      yield JSON.parse(line)
+    } catch (error) {
+      console.warn(`⚠️  Warning: skipping invalid JSON at ${path.basename(inputPath)}:${lineNumber}`);
+    }
+  }
+}
+
+/**
+ * Write one case inside an open transaction; re-seeding the same export replaces its rows
+ */
+async function seedCase(tx: Prisma.TransactionClient, data: SefirotData): Promise<SeedOutcome> {
   const { metadata, sefirot_results } = data
-  
-  // Create Case
-  console.log(`   Creating case: ${metadata.case_name}`);
-  const caseRecord = await prisma.case.create({
-    data: {
-      caseName: metadata.case_name,
-      scenario: metadata.scenario,
-      executionId: metadata.execution_id,
-      timestamp: new Date(metadata.timestamp),
-    },
+
+  if (!metadata?.case_name) {
+    console.warn(`⚠️  Warning: skipping export without metadata.case_name`);
+    return 'skipped'
+  }
+
+  const existing = await tx.case.findUnique({
+    where: { caseName: metadata.case_name },
+    select: { id: true },
   })
-  
-  console.log(`   ✓ Case created with ID: ${caseRecord.id}`);
-  
-  // Create SefirotResults for each Sefira
-  let sefirotCount = 0
-  for (const sefirot of SEFIROT_ORDER) {
-    if (sefirot_results?.[sefirot] && !sefirot_results[sefirot].error) {
+
+  if (existing) {
+    // Cases submitted through /api/analyze are never overwritten by a seed
+    const userAnalysis = await tx.userAnalysis.findFirst({
+      where: { caseName: metadata.case_name },
+      select: { id: true },
+    })
+    if (userAnalysis) {
+      console.warn(`⚠️  Warning: '${metadata.case_name}' was created by a user analysis, skipping`);
+      return 'skipped'
+    }
+    console.log(`   ↻ Replacing existing case: ${metadata.case_name}`);
+  }
+
+  // Build SefirotResult rows up front so they go out in a single multi-row insert
+  const sefirotRows = SEFIROT_ORDER
+    .filter((sefirot) => sefirot_results?.[sefirot] && !sefirot_results[sefirot].error)
+    .map((sefirot) => {
       const sefirotData = sefirot_results[sefirot]
-      
-      // Extract main score based on Sefira type
-      let mainScore: number | null = null
-      let scores: any = null
-      
-      if (sefirot === 'keter') {
-        mainScore = sefirotData?.alignment_score ?? null
-        scores = sefirotData?.scores ?? null
-      } else if (sefirot === 'chochmah') {
-        mainScore = sefirotData?.confidence_level ?? null
-      } else if (sefirot === 'binah') {
-        mainScore = sefirotData?.contextual_depth_score ?? null
-      } else if (sefirot === 'chesed') {
-        mainScore = sefirotData?.expansion_score ?? null
-      } else if (sefirot === 'gevurah') {
-        mainScore = sefirotData?.severity_score ?? null
-      } else if (sefirot === 'tiferet') {
-        mainScore = sefirotData?.harmony_score ?? null
-      } else if (sefirot === 'netzach') {
-        mainScore = sefirotData?.persistence_score ?? null
-      } else if (sefirot === 'hod') {
-        mainScore = sefirotData?.splendor_score ?? null
-      } else if (sefirot === 'yesod') {
-        mainScore = sefirotData?.integration_score ?? null
-      } else if (sefirot === 'malchut') {
-        mainScore = sefirotData?.manifestation_score ?? null
+
+      return {
+        sefira: sefirot,
+        sefirotNumber: sefirotData?.sefira_number ?? SEFIROT_ORDER.indexOf(sefirot) + 1,
+        hebrewName: sefirotData?.hebrew_name ?? '',
+        scores: sefirot === 'keter' ? sefirotData?.scores ?? undefined : undefined,
+        mainScore: sefirotData?.[MAIN_SCORE_KEYS[sefirot]] ?? null,
+        analysisData: sefirotData,
+        modelUsed: sefirotData?.model_used ?? sefirotData?.model_west ?? null,
+        timestamp: sefirotData?.timestamp ? new Date(sefirotData.timestamp) : new Date(),
+        activationCount: sefirotData?.activation_count ?? 1,
       }
-      
-      await prisma.sefirotResult.create({
-        data: {
-          caseId: caseRecord.id,
-          sefira: sefirot,
-          sefirotNumber: sefirotData?.sefira_number ?? SEFIROT_ORDER.indexOf(sefirot) + 1,
-          hebrewName: sefirotData?.hebrew_name ?? '',
-          scores: scores,
-          mainScore: mainScore,
-          analysisData: sefirotData,
-          modelUsed: sefirotData?.model_used ?? sefirotData?.model_west ?? null,
-          timestamp: sefirotData?.timestamp ? new Date(sefirotData.timestamp) : new Date(),
-          activationCount: sefirotData?.activation_count ?? 1,
-        },
-      })
-      
-      sefirotCount++
-    }
+    })
+
+  const caseFields = {
+    scenario: metadata.scenario,
+    executionId: metadata.execution_id,
+    timestamp: new Date(metadata.timestamp),
   }
-  
-  console.log(`   ✓ Created ${sefirotCount} SefirotResult records`);
-  
-  // Create BinahSigma if exists
-  if (sefirot_results?.binah && sefirot_results.binah?.mode === 'sigma') {
-    const binahData = sefirot_results.binah
-    const sigma = binahData?.sigma_synthesis ?? {}
-    
-    await prisma.binahSigma.create({
-      data: {
-        caseId: caseRecord.id,
-        mode: binahData.mode,
-        westPerspective: binahData?.west_analysis?.perspective ?? 'Western Liberal Democratic',
-        westAnalysis: binahData?.west_analysis ?? {},
-        eastPerspective: binahData?.east_analysis?.perspective ?? 'Eastern Collective Harmony',
-        eastAnalysis: binahData?.east_analysis ?? {},
-        sigmaSynthesis: sigma,
-        biasDelta: binahData?.bias_delta ?? 0,
-        divergenceLevel: binahData?.divergence_level ?? 'unknown',
-        blindSpotsDetected: binahData?.blind_spots_detected ?? 0,
-        convergencePoints: binahData?.convergence_points ?? 0,
-        contextualDepthScore: binahData?.contextual_depth_score ?? 0,
-        modelWest: binahData?.model_west ?? null,
-        modelEast: binahData?.model_east ?? null,
-        timestamp: binahData?.timestamp ? new Date(binahData.timestamp) : new Date(),
-      },
+  const caseRecord = await tx.case.upsert({
+    where: { caseName: metadata.case_name },
+    create: { caseName: metadata.case_name, ...caseFields },
+    update: caseFields,
+  })
+
+  // Replace all of the case's SefirotResults so no rows from an earlier run survive
+  await tx.sefirotResult.deleteMany({
+    where: { caseId: caseRecord.id },
+  })
+  await tx.sefirotResult.createMany({
+    data: sefirotRows.map((row) => ({ caseId: caseRecord.id, ...row })),
+  })
+
+  const binahData = sefirot_results?.binah
+  if (binahData?.mode === 'sigma') {
+    const sigmaFields = {
+      mode: binahData.mode,
+      westPerspective: binahData?.west_analysis?.perspective ?? 'Western Liberal Democratic',
+      westAnalysis: binahData?.west_analysis ?? {},
+      eastPerspective: binahData?.east_analysis?.perspective ?? 'Eastern Collective Harmony',
+      eastAnalysis: binahData?.east_analysis ?? {},
+      sigmaSynthesis: binahData?.sigma_synthesis ?? {},
+      biasDelta: binahData?.bias_delta ?? 0,
+      divergenceLevel: binahData?.divergence_level ?? 'unknown',
+      blindSpotsDetected: binahData?.blind_spots_detected ?? 0,
+      convergencePoints: binahData?.convergence_points ?? 0,
+      contextualDepthScore: binahData?.contextual_depth_score ?? 0,
+      modelWest: binahData?.model_west ?? null,
+      modelEast: binahData?.model_east ?? null,
+      timestamp: binahData?.timestamp ? new Date(binahData.timestamp) : new Date(),
+    }
+
+    await tx.binahSigma.upsert({
+      where: { caseId: caseRecord.id },
+      create: { caseId: caseRecord.id, ...sigmaFields },
+      update: sigmaFields,
+    })
+  } else {
+    await tx.binahSigma.deleteMany({
+      where: { caseId: caseRecord.id },
     })
-    
-    console.log(`   ✓ Created BinahSigma analysis record`);
   }
-  
-  console.log(`   ✅ Case '${metadata.case_name}' seeded successfully\n`);
+
+  console.log(`   ✓ ${metadata.case_name}: ${sefirotRows.length} Sefirot${binahData?.mode === 'sigma' ? ' + BinahSigma' : ''}`);
+
+  return existing ? 'replaced' : 'created'
+}
+
+/**
+ * Write a chunk of cases in one transaction
+ */
+async function seedChunk(chunk: SefirotData[], totals: Record<SeedOutcome, number>) {
+  const outcomes = await prisma.$transaction(
+    async (tx) => {
+      const results: SeedOutcome[] = []
+      for (const data of chunk) {
+        results.push(await seedCase(tx, data))
+      }
+      return results
+    },
+    { timeout: 60_000 }
+  )
+
+  for (const outcome of outcomes) {
+    totals[outcome]++
+  }
+}
+
+function parseArgs(argv: string[]) {
+  const inputs: string[] = []
+  let reset = false
+  let chunkSize = DEFAULT_CHUNK_SIZE
+
+  for (const arg of argv) {
+    if (arg === '--reset') {
+      reset = true
+    } else if (arg.startsWith('--chunk-size=')) {
+      chunkSize = Math.max(1, parseInt(arg.split('=')[1], 10) || DEFAULT_CHUNK_SIZE)
+    } else {
+      inputs.push(arg)
+    }
+  }
+
+  if (inputs.length === 0) {
+    inputs.push(path.join(__dirname, '..', 'data'))
+  }
+
+  return { inputs, reset, chunkSize }
 }
 
 async function main() {
   console.log('\n🌱 Starting Framework Tikun Olam database seed...\n')
   console.log('═'.repeat(80))
-  
+
+  const { inputs, reset, chunkSize } = parseArgs(process.argv.slice(2))
+
   try {
-    // Clear existing data
-    console.log('🧹 Cleaning existing data...');
-    await prisma.binahSigma.deleteMany({})
-    await prisma.sefirotResult.deleteMany({})
-    await prisma.case.deleteMany({})
-    await prisma.userAnalysis.deleteMany({})
-    console.log('   ✓ Existing data cleared\n');
-    
-    // Seed demo cases
-    const dataDir = path.join(__dirname, '..', 'data')
-    
-    const turritopsisPath = path.join(dataDir, 'Turritopsis_Rejuvenation_Sigma_20251207_215754.json')
-    const rbuPath = path.join(dataDir, 'RBU_ONU_Sigma_20251207_220527.json')
-    
-    if (fs.existsSync(turritopsisPath)) {
-      await seedCase(turritopsisPath)
-    } else {
-      console.warn(`⚠️  Warning: ${turritopsisPath} not found`);
+    if (reset) {
+      console.log('🧹 Cleaning existing case data...');
+      await prisma.binahSigma.deleteMany({})
+      await prisma.sefirotResult.deleteMany({})
+      await prisma.case.deleteMany({})
+      console.log('   ✓ Existing case data cleared\n');
     }
-    
-    if (fs.existsSync(rbuPath)) {
-      await seedCase(rbuPath)
-    } else {
-      console.warn(`⚠️  Warning: ${rbuPath} not found`);
+
+    const totals: Record<SeedOutcome, number> = { created: 0, replaced: 0, skipped: 0 }
+    let chunk: SefirotData[] = []
+
+    for (const inputPath of inputs) {
+      if (!fs.existsSync(inputPath)) {
+        console.warn(`⚠️  Warning: ${inputPath} not found`);
+        continue
+      }
+
+      console.log(`\n📊 Seeding cases from: ${inputPath}`);
+      for await (const data of readExports(inputPath)) {
+        chunk.push(data)
+        if (chunk.length >= chunkSize) {
+          await seedChunk(chunk, totals)
+          chunk = []
+        }
+      }
     }
-    
+
+    if (chunk.length > 0) {
+      await seedChunk(chunk, totals)
+    }
+
     // Summary
     const caseCount = await prisma.case.count()
     const sefirotCount = await prisma.sefirotResult.count()
     const sigmaCount = await prisma.binahSigma.count()
-    
+
     console.log('═'.repeat(80))
     console.log('\n✨ Seeding completed successfully!\n')
     console.log(`📊 Summary:`);
+    console.log(`   • Created: ${totals.created}, Replaced: ${totals.replaced}, Skipped: ${totals.skipped}`);
     console.log(`   • Cases: ${caseCount}`);
     console.log(`   • Sefirot Results: ${sefirotCount}`);
     console.log(`   • BinahSigma Analyses: ${sigmaCount}`);
     console.log('\n')
-    
+
   } catch (error) {
     console.error('\n❌ Error during seeding:', error)
     throw error